@@ -1,7 +1,46 @@
+import asyncio
+import re
+import threading
+
 import streamlit as st
-from travel_agent import agent_executor
+import tiktoken
+from travel_agent import build_agent_executor, ensure_calendar_credentials
 from langchain_core.messages import HumanMessage, AIMessage
 
+try:
+    _ENCODING = tiktoken.encoding_for_model("gpt-4o-mini")
+except KeyError:
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+
+
+# Users often paste multi-part prompts ("find flights to Rome, then find
+# hotels"). Sequencing markers split these into sub-queries that can run as
+# concurrent agent loops instead of one long serial one.
+_SUBQUERY_RE = re.compile(r"\n+|(?:[,.;]\s*|\s+)(?:and\s+)?then\s+", re.IGNORECASE)
+
+
+def _split_subqueries(prompt):
+    """Split a multi-part prompt into independent sub-queries."""
+    return [part.strip() for part in _SUBQUERY_RE.split(prompt) if part.strip()]
+
+
+def _trim_history(messages, max_tokens=2000):
+    """
+    Keep only the most recent messages that fit in `max_tokens`.
+
+    The full session history grows without bound, and every extra token is
+    re-prefilled (and billed) on every turn. Trimming from the oldest end
+    keeps the per-turn prompt size constant regardless of session length.
+    """
+    kept = []
+    total = 0
+    for message in reversed(messages):
+        total += len(_ENCODING.encode(message.content))
+        if total > max_tokens and kept:
+            break
+        kept.append(message)
+    return list(reversed(kept))
+
 # --- Page Configuration ---
 st.set_page_config(
     page_title="AI Travel Concierge",
@@ -10,6 +49,44 @@ st.set_page_config(
     initial_sidebar_state="auto",
 )
 
+# --- Calendar Authorization ---
+# Run the (possibly interactive) OAuth flow once at startup. If it fails,
+# fail fast here rather than letting a tool call stall mid-conversation.
+try:
+    ensure_calendar_credentials()
+except Exception as e:
+    st.error(f"Google Calendar authorization failed: {e}")
+    st.stop()
+
+
+# --- Agent Executor ---
+# Streamlit reruns this script top to bottom on every interaction;
+# cache_resource guarantees the agent, tools, and any future expensive
+# initialization are built exactly once per worker process.
+@st.cache_resource
+def get_executor():
+    return build_agent_executor()
+
+
+# All agent coroutines run on one persistent loop per worker. The executor
+# (and the keep-alive connections inside its async HTTP client) outlives any
+# single turn, so a fresh loop per turn would leave pooled connections bound
+# to a closed loop and crash the next turn with "Event loop is closed".
+@st.cache_resource
+def get_event_loop():
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+
+agent_executor = get_executor()
+agent_loop = get_event_loop()
+
+
+def _run_async(coro):
+    """Run a coroutine on the persistent agent loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, agent_loop).result()
+
 # --- Page Title and Introduction ---
 st.title("✈️ AI Travel Concierge")
 st.write("I'm your personal AI assistant for planning and booking trips. Ask me anything!")
@@ -34,17 +111,36 @@ if prompt := st.chat_input("Ask me about flights, hotels, and more..."):
 
     # --- Generate and display assistant's response ---
     with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            # THE CRITICAL CHANGE IS HERE:
-            # We now pass the 'chat_history' to the agent.
-            # We also ensure the history doesn't include the latest prompt, which is passed as 'input'.
-            response = agent_executor.invoke({
+        # We pass the 'chat_history' to the agent, without the latest prompt
+        # (which is passed as 'input'). Multi-part prompts are split into
+        # sub-queries and batched through concurrent agent loops; a single
+        # query is streamed token by token, so the user sees text as soon as
+        # the model starts decoding instead of waiting for the whole agent
+        # loop to finish.
+        sub_queries = _split_subqueries(prompt)
+        history = _trim_history(st.session_state.messages[:-1])
+
+        def stream_response():
+            tokens = agent_executor.astream_tokens({
                 "input": prompt,
-                "chat_history": st.session_state.messages[:-1] # Pass all messages except the last one
-            })
+                "chat_history": history
+            }).__aiter__()
+            while True:
+                try:
+                    yield _run_async(tokens.__anext__())
+                except StopAsyncIteration:
+                    break
 
-            assistant_response = response['output']
+        if len(sub_queries) > 1:
+            with st.spinner("Thinking..."):
+                responses = _run_async(agent_executor.abatch(
+                    [{"input": q, "chat_history": history} for q in sub_queries],
+                    max_concurrency=5,
+                ))
+            assistant_response = "\n\n".join(r["output"] for r in responses)
             st.markdown(assistant_response)
+        else:
+            assistant_response = st.write_stream(stream_response)
 
     # Add assistant's response to history
     st.session_state.messages.append(AIMessage(content=assistant_response))
@@ -1,29 +1,126 @@
 import os
+import asyncio
 import datetime
+import functools
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+
+import httplib2
+import httpx
 from dotenv import load_dotenv
-from typing import TypedDict, List, Optional
+from typing import TypedDict, List, NamedTuple, Optional
 
 # --- LangChain Imports ---
-from langchain.agents import AgentExecutor, create_openai_tools_agent
+from langchain.agents.format_scratchpad.openai_tools import format_to_openai_tool_messages
+from langchain.agents.output_parsers.openai_tools import OpenAIToolsAgentOutputParser
+from langchain_core.agents import AgentFinish
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.tools import tool
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import SystemMessage
 
 # --- Google Calendar Imports ---
+import google_auth_httplib2
+from google.auth.exceptions import RefreshError
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 
 # --- 1. Load Environment Variables ---
-# This loads your OpenAI API key from the .env file
-load_dotenv()
+# This loads your OpenAI API key from the .env file. Guarded so the .env
+# scan happens once per process even if this runs again (e.g. via exec).
+if not os.getenv("_TRAVEL_AGENT_ENV_LOADED"):
+    load_dotenv()
+    os.environ["_TRAVEL_AGENT_ENV_LOADED"] = "1"
+
+# Run any LangChain callbacks (tracing, logging) in the background so the
+# user-facing response is never blocked on trace writes. Debug prints from
+# the executor are opt-in via DEBUG=1.
+os.environ.setdefault("LANGCHAIN_CALLBACKS_BACKGROUND", "true")
+_DEBUG = os.getenv("DEBUG") == "1"
 
 # --- 2. Define All Tools ---
 # These are the functions the agent can decide to use.
+# All tools are coroutines so the AgentExecutor's async loop can overlap
+# tool I/O with the next LLM round-trip instead of blocking on each call.
+
+def _cached_tool(func, maxsize=256):
+    """
+    Memoize a deterministic tool coroutine on its JSON-encoded arguments.
+
+    The model frequently re-asks the same search within a session; a cache
+    hit answers in microseconds instead of a network round-trip. Only apply
+    this to tools that are pure functions of their arguments.
+    """
+    cache: OrderedDict = OrderedDict()
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        key = json.dumps([args, kwargs], sort_keys=True, default=str)
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        result = await func(*args, **kwargs)
+        cache[key] = result
+        if len(cache) > maxsize:
+            cache.popitem(last=False)
+        return result
+
+    return wrapper
+
+
+# Tool arguments already arrive in YYYY-MM-DD form; validating with a regex
+# avoids allocating a datetime object just to re-emit the same string.
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+# Tool results are typed tuples rather than dicts: a NamedTuple stores its
+# fields in a plain tuple, skipping the per-instance hash table a dict
+# carries, which matters once results accumulate in the session history.
+# They are serialized to JSON only at the LangChain boundary via _to_json.
+
+class FlightOption(NamedTuple):
+    id: str
+    departure: str
+    arrival: str
+    price: float
+    departure_time: str
+
+
+class HotelOption(NamedTuple):
+    id: str
+    name: str
+    price_per_night: float
+
+
+class BookingConfirmation(NamedTuple):
+    status: str
+    confirmation_id: str
+
+
+def _to_json(records) -> str:
+    """Serialize a typed result (or list of them) for the tool observation."""
+    if isinstance(records, list):
+        return json.dumps([r._asdict() for r in records])
+    return json.dumps(records._asdict())
+
+
+_HOTEL_OPTIONS = [
+    HotelOption(id="HOT789", name="Grand Plaza Hotel", price_per_night=250.00),
+    HotelOption(id="HOT101", name="City Center Inn", price_per_night=180.00),
+]
+# The hotel payload is fully static, so it is serialized once at import.
+_HOTELS_JSON = _to_json(_HOTEL_OPTIONS)
+
 
 @tool
-def search_flights(destination: str, travel_dates: Optional[str] = None) -> List[dict]: # <-- 1. EXPECT A STRING
+@_cached_tool
+async def search_flights(destination: str, travel_dates: Optional[str] = None) -> str: # <-- 1. EXPECT A STRING
     """
     Looks up and returns available flights for a given destination and optional dates.
     The travel_dates argument should be a string in the format 'YYYY-MM-DD to YYYY-MM-DD'.
@@ -33,33 +130,37 @@ def search_flights(destination: str, travel_dates: Optional[str] = None) -> List
     # --- 2. NEW LOGIC TO PARSE THE DATE STRING ---
     start_date = (datetime.date.today() + datetime.timedelta(days=28)).strftime("%Y-%m-%d") # Default
     if travel_dates:
-        try:
-            # Assumes format "YYYY-MM-DD to YYYY-MM-DD"
-            start_date_str, end_date_str = travel_dates.split(' to ')
-            start_date = datetime.datetime.fromisoformat(start_date_str).strftime("%Y-%m-%d")
-            print(f"Using parsed dates: Start - {start_date}, End - {end_date_str}")
-        except ValueError:
+        # Assumes format "YYYY-MM-DD to YYYY-MM-DD"; the string is already in
+        # the output format, so validation is enough - no datetime round-trip.
+        parts = travel_dates.split(' to ')
+        if len(parts) == 2 and _DATE_RE.match(parts[0]):
+            start_date = parts[0]
+            print(f"Using parsed dates: Start - {start_date}, End - {parts[1]}")
+        else:
             print("Could not parse date string, using default dates.")
     else:
         print("No travel dates provided, using default dates.")
     # --- END OF NEW LOGIC ---
 
-    return [
-        {"id": "FL123", "departure": "New York (JFK)", "arrival": destination, "price": 450.00, "departure_time": f"{start_date}T08:00:00"},
-        {"id": "FL456", "departure": "New York (JFK)", "arrival": destination, "price": 550.00, "departure_time": f"{start_date}T11:00:00"},
-    ]
+    return _to_json([
+        FlightOption(id="FL123", departure="New York (JFK)", arrival=destination,
+                     price=450.00, departure_time=f"{start_date}T08:00:00"),
+        FlightOption(id="FL456", departure="New York (JFK)", arrival=destination,
+                     price=550.00, departure_time=f"{start_date}T11:00:00"),
+    ])
 
 @tool
-def book_flight(flight_id: str) -> dict:
+async def book_flight(flight_id: str) -> str:
     """
     Books a flight using its ID.
     This is a mock tool and returns a confirmation.
     """
     print(f"\nTOOL USED: Booking flight with ID {flight_id}...")
-    return {"status": "success", "confirmation_id": f"CONF-{flight_id}-BKD"}
+    return _to_json(BookingConfirmation(status="success", confirmation_id=f"CONF-{flight_id}-BKD"))
 
 @tool
-def Google_Hotels(destination: str, travel_dates: Optional[str] = None) -> List[dict]:
+@_cached_tool
+async def Google_Hotels(destination: str, travel_dates: Optional[str] = None) -> str:
     """
     Looks up and returns available hotels for a given destination and optional dates.
     The travel_dates argument should be a string in the format 'YYYY-MM-DD to YYYY-MM-DD'.
@@ -68,83 +169,172 @@ def Google_Hotels(destination: str, travel_dates: Optional[str] = None) -> List[
 
     # --- Logic to handle missing or string-formatted dates ---
     if travel_dates:
-        try:
-            # Assumes format "YYYY-MM-DD to YYYY-MM-DD"
-            start_date_str, end_date_str = travel_dates.split(' to ')
-            print(f"Using parsed dates for hotel search: Start - {start_date_str}, End - {end_date_str}")
-        except ValueError:
+        # Assumes format "YYYY-MM-DD to YYYY-MM-DD"
+        parts = travel_dates.split(' to ')
+        if len(parts) == 2 and _DATE_RE.match(parts[0]):
+            print(f"Using parsed dates for hotel search: Start - {parts[0]}, End - {parts[1]}")
+        else:
             print("Could not parse date string for hotels, proceeding without specific dates.")
     else:
         print("No travel dates provided for hotel search.")
     # --- End of logic ---
 
-    return [
-        {"id": "HOT789", "name": "Grand Plaza Hotel", "price_per_night": 250.00},
-        {"id": "HOT101", "name": "City Center Inn", "price_per_night": 180.00},
-    ]
+    return _HOTELS_JSON
 @tool
-def book_hotel(hotel_id: str) -> dict:
+async def book_hotel(hotel_id: str) -> str:
     """
     Books a hotel room using its ID.
     This is a mock tool.
     """
     print(f"\nTOOL USED: Booking hotel with ID {hotel_id}...")
-    return {"status": "success", "confirmation_id": f"CONF-{hotel_id}-BKD"}
+    return _to_json(BookingConfirmation(status="success", confirmation_id=f"CONF-{hotel_id}-BKD"))
 
-@tool
-def create_calendar_event(title: str, start_time: str, end_time: str, description: str) -> str:
-    """
-    Creates an event in the user's Google Calendar.
-    - title: The title of the calendar event.
-    - start_time: The start time of the event in ISO format (e.g., '2024-07-01T08:00:00').
-    - end_time: The end time of the event in ISO format.
-    - description: A description or notes for the event.
+SCOPES = ["https://www.googleapis.com/auth/calendar"]
+
+# The Calendar client is cached at module scope: build() fetches and parses
+# the Discovery document, which costs far more than the events().insert call
+# it enables, so paying it once per process is the whole point.
+_CAL_SERVICE = None
+_CAL_CREDS = None
+_CAL_LOCK = threading.Lock()
+
+
+def _load_credentials():
+    """Load credentials from token.json and refresh them in place if expired.
+
+    Never starts the interactive OAuth flow; that belongs to startup only.
     """
-    print("\nTOOL USED: Creating Google Calendar event...")
-    SCOPES = ["https://www.googleapis.com/auth/calendar"]
-    creds = None
+    global _CAL_CREDS
+    if _CAL_CREDS is None and os.path.exists("token.json"):
+        _CAL_CREDS = Credentials.from_authorized_user_file("token.json", SCOPES)
+    if _CAL_CREDS and not _CAL_CREDS.valid and _CAL_CREDS.expired and _CAL_CREDS.refresh_token:
+        try:
+            _CAL_CREDS.refresh(Request())
+        except RefreshError:
+            return None
+        with open("token.json", "w") as token:
+            token.write(_CAL_CREDS.to_json())
+    return _CAL_CREDS
 
-    if os.path.exists("token.json"):
-        creds = Credentials.from_authorized_user_file("token.json", SCOPES)
 
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
+def ensure_calendar_credentials():
+    """Make sure valid Calendar credentials exist, running the OAuth flow if not.
+
+    flow.run_local_server blocks on an interactive browser dance, which must
+    never happen mid-turn inside a tool. Call this once at app startup so a
+    missing or revoked token fails fast there instead of stalling the agent.
+    """
+    global _CAL_CREDS, _CAL_SERVICE
+    with _CAL_LOCK:
+        creds = _load_credentials()
+        if not creds or not creds.valid:
             flow = InstalledAppFlow.from_client_secrets_file("credentials.json", SCOPES)
-            creds = flow.run_local_server(port=0)
-        with open("token.json", "w") as token:
-            token.write(creds.to_json())
+            _CAL_CREDS = flow.run_local_server(port=0)
+            _CAL_SERVICE = None  # creds changed; any old client is stale
+            with open("token.json", "w") as token:
+                token.write(_CAL_CREDS.to_json())
+
+
+def _get_calendar_service():
+    """Return a cached Calendar service; assumes credentials were prechecked."""
+    global _CAL_SERVICE
+    with _CAL_LOCK:
+        creds = _load_credentials()
+        if not creds or not creds.valid:
+            raise RuntimeError(
+                "Google Calendar credentials are missing or invalid; "
+                "restart the app to re-authorize."
+            )
+        if _CAL_SERVICE is None:
+            _CAL_SERVICE = build(
+                "calendar", "v3", credentials=creds, cache_discovery=False
+            )
+        return _CAL_SERVICE
 
+
+def _authorized_http():
+    """Build a fresh authorized Http for a single request.
+
+    httplib2.Http is not thread-safe, and the runtime can run two calendar
+    inserts concurrently (parallel tool rounds, abatch sub-queries), so the
+    connection must not be shared; only the credentials and the on-disk
+    response cache are. The service object itself stays cached - it is the
+    discovery parsing that is expensive, not the Http.
+    """
+    with _CAL_LOCK:
+        creds = _load_credentials()
+    return google_auth_httplib2.AuthorizedHttp(
+        creds, http=httplib2.Http(cache=".cache")
+    )
+
+
+def _create_calendar_event_blocking(title: str, start_time: str, end_time: str, description: str) -> str:
+    """Synchronous Google Calendar insert; run off the event loop via asyncio.to_thread."""
     try:
-        service = build("calendar", "v3", credentials=creds)
+        service = _get_calendar_service()
         event = {
             "summary": title,
             "description": description,
             "start": {"dateTime": start_time, "timeZone": "America/New_York"},
             "end": {"dateTime": end_time, "timeZone": "America/New_York"},
+            # A deterministic id derived from the arguments makes the insert
+            # idempotent: if the agent retries the same event, Google rejects
+            # the duplicate (409) instead of double-booking the calendar.
+            "id": hashlib.sha1(
+                json.dumps([title, start_time, end_time], sort_keys=True).encode()
+            ).hexdigest(),
         }
-        event = service.events().insert(calendarId="primary", body=event).execute()
+        event = (
+            service.events()
+            .insert(calendarId="primary", body=event)
+            .execute(http=_authorized_http())
+        )
         print(f"Event created: {event.get('htmlLink')}")
         return f"Successfully created event with ID: {event.get('id')}"
     except Exception as e:
         return f"Error creating event: {e}"
 
-# --- 3. Create the Agent ---
+@tool
+async def create_calendar_event(title: str, start_time: str, end_time: str, description: str) -> str:
+    """
+    Creates an event in the user's Google Calendar.
+    - title: The title of the calendar event.
+    - start_time: The start time of the event in ISO format (e.g., '2024-07-01T08:00:00').
+    - end_time: The end time of the event in ISO format.
+    - description: A description or notes for the event.
+    """
+    print("\nTOOL USED: Creating Google Calendar event...")
+    # The Google API client is synchronous, so hand it to a worker thread
+    # to keep the agent's event loop free while the request is in flight.
+    return await asyncio.to_thread(
+        _create_calendar_event_blocking, title, start_time, end_time, description
+    )
 
-# Initialize the Language Model
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+# --- 3. Create the Agent ---
 
 # Create a list of all the tools the agent can use
 tools = [search_flights, book_flight, Google_Hotels, book_hotel, create_calendar_event]
 
-# Define the prompt template for the agent
-# New, more powerful prompt with memory
-agent_prompt = ChatPromptTemplate.from_messages(
-    [
-        (
-            "system",
-            """You are a helpful travel assistant. Your goal is to help the user book a flight and hotel,
+# The OpenAI function specs for the tool set are serialized once to JSON so
+# agent construction does not pay for pydantic schema introspection (it
+# matters for cold starts). Regenerate with `python travel_agent.py` whenever
+# a tool signature or docstring changes.
+_TOOLS_SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tools_schema.json")
+
+
+def _load_tool_schemas() -> List[dict]:
+    """Load the precomputed tool specs, converting at runtime as a fallback."""
+    if os.path.exists(_TOOLS_SCHEMA_PATH):
+        with open(_TOOLS_SCHEMA_PATH) as f:
+            return json.load(f)
+    return [convert_to_openai_tool(t) for t in tools]
+
+@functools.lru_cache(maxsize=2)
+def _system_message(today_ordinal: int) -> SystemMessage:
+    """Render the static system message once per day instead of per call."""
+    today = datetime.date.fromordinal(today_ordinal)
+    return SystemMessage(
+        content=f"""You are a helpful travel assistant. Your goal is to help the user book a flight and hotel,
             and then add the trip to their calendar.
 
             You have access to a conversation history with the user. Use this history to fill in any missing details in the user's latest request.
@@ -153,20 +343,246 @@ agent_prompt = ChatPromptTemplate.from_messages(
             IMPORTANT: You must gather all necessary information (like destination AND dates for a flight search) from the user's request and the chat history before calling a tool.
 
             When you have completed all tasks, you must provide a final, comprehensive summary to the user.
-            Today's date is {today}.""",
+            Today's date is {today}."""
+    )
+
+
+def _build_agent_prompt() -> ChatPromptTemplate:
+    """Define the prompt template for the agent, with memory.
+
+    The system message is a pre-rendered SystemMessage (cached by day), so
+    format_messages only has to splice in the dynamic placeholders per call
+    instead of re-running the string template every turn.
+    """
+    return ChatPromptTemplate.from_messages(
+        [
+            _system_message(datetime.date.today().toordinal()),
+            # The 'chat_history' will be populated with past messages.
+            MessagesPlaceholder(variable_name="chat_history"),
+            ("user", "{input}"),
+            # The 'agent_scratchpad' is for the agent's internal thoughts and tool outputs for the current step.
+            MessagesPlaceholder(variable_name="agent_scratchpad"),
+        ]
+    )
+
+# Static provenance edges between tools: a booking consumes an id produced by
+# the corresponding search, so within one planning round it has to wait for it.
+# Everything else (e.g. search_flights vs Google_Hotels) is independent.
+_TOOL_DEPENDENCIES = {
+    "book_flight": {"search_flights"},
+    "book_hotel": {"Google_Hotels"},
+    "create_calendar_event": {"book_flight", "book_hotel"},
+}
+
+
+# Cheap pre-pass used for speculative tool calling: if the user's message
+# already names a destination (and maybe dates), the flight search can be
+# fired the moment the turn starts, hiding its round-trip behind the model's
+# planning call. The regexes only need to be right often enough to pay off;
+# a miss just means no speculation.
+_DEST_RE = re.compile(r"\b(?:to|in)\s+([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)?)")
+_DATES_RE = re.compile(r"(\d{4}-\d{2}-\d{2})\s*(?:to|until|through|-)\s*(\d{4}-\d{2}-\d{2})")
+
+
+def _extract_search_args(prompt: str) -> Optional[dict]:
+    """Extract probable search_flights arguments from the raw user prompt."""
+    match = _DEST_RE.search(prompt)
+    if not match:
+        return None
+    dates = _DATES_RE.search(prompt)
+    return {
+        "destination": match.group(1),
+        "travel_dates": f"{dates.group(1)} to {dates.group(2)}" if dates else None,
+    }
+
+
+class _TokenQueueHandler(AsyncCallbackHandler):
+    """Forwards content tokens from the chat model into an asyncio queue."""
+
+    def __init__(self, queue: asyncio.Queue):
+        self.queue = queue
+
+    async def on_llm_new_token(self, token: str, **kwargs) -> None:
+        if token:
+            self.queue.put_nowait(token)
+
+
+class ParallelToolAgentExecutor:
+    """
+    LLMCompiler-style runtime for the OpenAI tools agent.
+
+    Instead of executing the model's tool calls one after another the way
+    AgentExecutor does, each planning round is treated as a small DAG:
+    tool calls with no dependency edge between them are dispatched together
+    with asyncio.gather, so two network-bound calls (a flight search plus a
+    hotel search, typically) cost max(t1, t2) instead of t1 + t2. All the
+    observations from a round are fed back to the model as one batch of
+    tool messages via `intermediate_steps`.
+    """
+
+    def __init__(self, agent, tools, verbose=False, max_iterations=15):
+        self.agent = agent
+        self.tools = {t.name: t for t in tools}
+        self.verbose = verbose
+        self.max_iterations = max_iterations
+
+    async def _run_tool(self, action, speculation=None):
+        if speculation is not None and action.tool == "search_flights":
+            spec_args, task = speculation
+            if {k: action.tool_input.get(k) for k in spec_args} == spec_args:
+                if self.verbose:
+                    print(f"\nSpeculative `search_flights` hit for `{spec_args}`")
+                return action, await task
+        if self.verbose:
+            print(f"\nInvoking: `{action.tool}` with `{action.tool_input}`")
+        tool_ = self.tools.get(action.tool)
+        if tool_ is None:
+            # The model occasionally hallucinates a tool name; feed the error
+            # back as an observation so it can correct itself, instead of
+            # aborting the turn with a KeyError.
+            return action, (
+                f"{action.tool} is not a valid tool, "
+                f"try one of [{', '.join(self.tools)}]."
+            )
+        observation = await tool_.ainvoke(action.tool_input)
+        return action, observation
+
+    async def ainvoke(self, inputs: dict, callbacks=None) -> dict:
+        # Speculative tool calling: if the prompt already names a destination,
+        # start the flight search now so it runs concurrently with the
+        # model's first planning call. The result is only consumed if the
+        # agent's actual tool call matches; otherwise it is cancelled.
+        speculation = spec_task = None
+        spec_args = _extract_search_args(inputs.get("input", ""))
+        if spec_args:
+            spec_task = asyncio.create_task(
+                self.tools["search_flights"].ainvoke(spec_args)
+            )
+            speculation = (spec_args, spec_task)
+        try:
+            intermediate_steps = []
+            for _ in range(self.max_iterations):
+                plan = await self.agent.ainvoke(
+                    {**inputs, "intermediate_steps": intermediate_steps},
+                    config={"callbacks": callbacks} if callbacks else None,
+                )
+                if isinstance(plan, AgentFinish):
+                    return {**inputs, "output": plan.return_values["output"]}
+                pending = list(plan) if isinstance(plan, list) else [plan]
+                # Execute the round as a DAG: gather every action whose
+                # dependencies are not also scheduled in this round, then run
+                # the dependent ones once their inputs exist.
+                while pending:
+                    scheduled = {a.tool for a in pending}
+                    batch = [
+                        a for a in pending
+                        if not (_TOOL_DEPENDENCIES.get(a.tool, set()) & (scheduled - {a.tool}))
+                    ] or pending[:1]
+                    results = await asyncio.gather(
+                        *(self._run_tool(a, speculation) for a in batch)
+                    )
+                    intermediate_steps.extend(results)
+                    done = {id(a) for a in batch}
+                    pending = [a for a in pending if id(a) not in done]
+                speculation = None  # only valid for the first planning round
+            return {**inputs, "output": "Agent stopped: maximum iterations reached."}
+        finally:
+            if spec_task is not None and not spec_task.done():
+                spec_task.cancel()
+
+    async def abatch(self, inputs_list: List[dict], max_concurrency: int = 5) -> List[dict]:
+        """
+        Run several independent inputs concurrently, preserving order.
+
+        Concurrency is capped with a semaphore so a many-part prompt cannot
+        blow through the OpenAI rate limit.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _one(inputs: dict) -> dict:
+            async with semaphore:
+                return await self.ainvoke(inputs)
+
+        return list(await asyncio.gather(*(_one(inputs) for inputs in inputs_list)))
+
+    async def astream_tokens(self, inputs: dict):
+        """
+        Yield the assistant's answer token by token.
+
+        Planning rounds that emit tool calls produce no content tokens, so
+        in practice this streams the final answer as soon as the model
+        starts decoding it, instead of blocking until the whole agent loop
+        has returned.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        sentinel = object()
+        result = {}
+
+        async def _run():
+            try:
+                result.update(
+                    await self.ainvoke(inputs, callbacks=[_TokenQueueHandler(queue)])
+                )
+            finally:
+                queue.put_nowait(sentinel)
+
+        task = asyncio.create_task(_run())
+        streamed = False
+        while True:
+            token = await queue.get()
+            if token is sentinel:
+                break
+            streamed = True
+            yield token
+        await task  # surface any exception from the agent loop
+        if not streamed and result.get("output"):
+            # A turn can finish without content tokens (e.g. the
+            # max-iterations bailout); fall back to the final output so the
+            # UI never renders an empty assistant message.
+            yield result["output"]
+
+
+def build_agent_executor() -> ParallelToolAgentExecutor:
+    """Build the LLM, prompt, agent, and executor.
+
+    This is the expensive part of startup; build it once per worker and
+    reuse it across Streamlit reruns (app.py wraps it in st.cache_resource).
+    Verbose printing of the agent's steps is helpful while developing but
+    adds per-step overhead on the hot path, so it is gated on DEBUG=1.
+    """
+    # `streaming=True` makes the model emit tokens through callbacks as it
+    # decodes, which is what lets the UI render the answer incrementally.
+    # The shared client keeps connections alive across turns, so successive
+    # OpenAI calls reuse one TLS session instead of paying a handshake each
+    # time. (HTTP/1.1: http2=True would require the optional h2 package.)
+    llm = ChatOpenAI(
+        model="gpt-4o-mini",
+        temperature=0,
+        streaming=True,
+        http_async_client=httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=20),
         ),
-        # The 'chat_history' will be populated with past messages.
-        MessagesPlaceholder(variable_name="chat_history"),
-        ("user", "{input}"),
-        # The 'agent_scratchpad' is for the agent's internal thoughts and tool outputs for the current step.
-        MessagesPlaceholder(variable_name="agent_scratchpad"),
-    ]
-).partial(today=datetime.date.today())
-
-# Create the agent itself by combining the LLM, the prompt, and the tools
-agent = create_openai_tools_agent(llm, tools, agent_prompt)
-
-# The AgentExecutor is the runtime that makes the agent work.
-# It handles the loop of calling the agent, running tools, and feeding the output back to the agent.
-# `verbose=True` will print out the agent's thoughts, which is very helpful for seeing how it works.
-agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
+    )
+    # Bind the precomputed function specs directly rather than going through
+    # create_openai_tools_agent, which would re-convert every tool.
+    llm_with_tools = llm.bind(tools=_load_tool_schemas())
+    agent = (
+        {
+            "input": lambda x: x["input"],
+            "chat_history": lambda x: x["chat_history"],
+            "agent_scratchpad": lambda x: format_to_openai_tool_messages(
+                x["intermediate_steps"]
+            ),
+        }
+        | _build_agent_prompt()
+        | llm_with_tools
+        | OpenAIToolsAgentOutputParser()
+    )
+    return ParallelToolAgentExecutor(agent=agent, tools=tools, verbose=_DEBUG)
+
+
+if __name__ == "__main__":
+    # Regenerate the serialized tool specs after changing a tool.
+    with open(_TOOLS_SCHEMA_PATH, "w") as f:
+        json.dump([convert_to_openai_tool(t) for t in tools], f, indent=2)
+    print(f"Wrote {_TOOLS_SCHEMA_PATH}")